@@ -5,11 +5,14 @@ MongoDB helper functions ready to use in your backend code.
 Import and use these functions in your API endpoints for database operations.
 """
 
-from pymongo import MongoClient
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
 from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
-from typing import Union
+from typing import Dict, List, Union
 from pydantic import BaseModel
 
 # Load environment variables from .env file
@@ -22,11 +25,18 @@ database_url = os.getenv("DATABASE_URL")
 database_name = os.getenv("DATABASE_NAME")
 
 if database_url and database_name:
-    _client = MongoClient(database_url)
+    # Bounded pool so bursts queue briefly instead of opening a socket per request
+    _client = AsyncIOMotorClient(
+        database_url,
+        maxPoolSize=int(os.getenv("DATABASE_MAX_POOL_SIZE", 100)),
+        minPoolSize=int(os.getenv("DATABASE_MIN_POOL_SIZE", 10)),
+        waitQueueTimeoutMS=2000,
+        serverSelectionTimeoutMS=2000,
+    )
     db = _client[database_name]
 
 # Helper functions for common database operations
-def create_document(collection_name: str, data: Union[BaseModel, dict]):
+async def create_document(collection_name: str, data: Union[BaseModel, dict]):
     """Insert a single document with timestamp"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -40,10 +50,46 @@ def create_document(collection_name: str, data: Union[BaseModel, dict]):
     data_dict['created_at'] = datetime.now(timezone.utc)
     data_dict['updated_at'] = datetime.now(timezone.utc)
 
-    result = db[collection_name].insert_one(data_dict)
+    result = await db[collection_name].insert_one(data_dict)
     return str(result.inserted_id)
 
-def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
+async def create_documents(collection_name: str, items: List[Union[BaseModel, dict]]):
+    """Insert several documents in a single unordered batch, stamping any without timestamps"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+    if not items:
+        return []
+
+    now = datetime.now(timezone.utc)
+    docs = []
+    for data in items:
+        data_dict = data.model_dump() if isinstance(data, BaseModel) else data.copy()
+        data_dict.setdefault('created_at', now)
+        data_dict.setdefault('updated_at', data_dict['created_at'])
+        docs.append(data_dict)
+
+    result = await db[collection_name].insert_many(docs, ordered=False)
+    return [str(i) for i in result.inserted_ids]
+
+async def upsert_document(collection_name: str, filter_dict: dict, data: Union[BaseModel, dict]):
+    """Atomically update the document matching filter_dict, inserting it if missing"""
+    if db is None:
+        raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
+
+    data_dict = data.model_dump() if isinstance(data, BaseModel) else data.copy()
+    now = datetime.now(timezone.utc)
+    data_dict['updated_at'] = now
+
+    update = {"$set": data_dict, "$setOnInsert": {"created_at": now}}
+    try:
+        result = await db[collection_name].update_one(filter_dict, update, upsert=True)
+    except DuplicateKeyError:
+        # A concurrent upsert inserted first (the server only retries this itself for
+        # pure equality filters); the document now exists, so the retry updates it
+        result = await db[collection_name].update_one(filter_dict, update, upsert=True)
+    return str(result.upserted_id) if result.upserted_id else None
+
+async def get_documents(collection_name: str, filter_dict: dict = None, limit: int = None):
     """Get documents from collection"""
     if db is None:
         raise Exception("Database not available. Check DATABASE_URL and DATABASE_NAME environment variables.")
@@ -52,4 +98,66 @@ def get_documents(collection_name: str, filter_dict: dict = None, limit: int = N
     if limit:
         cursor = cursor.limit(limit)
     
-    return list(cursor)
+    return await cursor.to_list(length=None)
+
+async def ping_database():
+    """Round-trip to the server so the pool opens connections before traffic arrives"""
+    if db is None:
+        return
+
+    await db.command("ping")
+
+async def ensure_indexes() -> Dict[str, Exception]:
+    """Create the indexes backing the API's hot queries; returns failures by collection"""
+    if db is None:
+        return {}
+
+    indexes = {
+        "wallettransaction": [IndexModel([("user_id", ASCENDING), ("type", ASCENDING)])],
+        "notification": [IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING)])],
+        "callrecord": [
+            IndexModel([("campaign_id", ASCENDING), ("created_at", DESCENDING)]),
+            IndexModel([("buyer_id", ASCENDING)]),
+            IndexModel([("seller_id", ASCENDING)]),
+        ],
+        "selleracceptance": [IndexModel([("campaign_id", ASCENDING), ("seller_id", ASCENDING)], unique=True)],
+        "routingassignment": [IndexModel([("campaign_id", ASCENDING)], unique=True)],
+        "user": [
+            IndexModel([("email", ASCENDING)], unique=True),
+            IndexModel([("role", ASCENDING)]),
+        ],
+        "campaign": [
+            IndexModel([("buyer_id", ASCENDING), ("status", ASCENDING), ("created_at", DESCENDING)]),
+            IndexModel([("buyer_id", ASCENDING), ("created_at", DESCENDING)]),
+        ],
+    }
+    # One collection's failure (e.g. duplicates blocking a unique index) must not skip the rest
+    failures = {}
+    for collection_name, models in indexes.items():
+        try:
+            await db[collection_name].create_indexes(models)
+        except Exception as e:
+            failures[collection_name] = e
+    return failures
+
+async def ledger_balance(user_id: ObjectId) -> float:
+    """Sum a user's wallet ledger (credits minus debits), matching legacy string references too"""
+    totals = {
+        row["_id"]: float(row["total"])
+        async for row in db["wallettransaction"].aggregate([
+            {"$match": {"user_id": {"$in": [user_id, str(user_id)]}}},
+            {"$group": {"_id": "$type", "total": {"$sum": "$amount"}}},
+        ])
+    }
+    return totals.get("credit", 0.0) - totals.get("debit", 0.0)
+
+async def backfill_balances():
+    """One-time: seed user.balance from the ledger for users created before it was cached"""
+    if db is None:
+        return
+
+    async for user in db["user"].find({"balance": {"$exists": False}}, {"_id": 1}):
+        await db["user"].update_one(
+            {"_id": user["_id"], "balance": {"$exists": False}},
+            {"$set": {"balance": await ledger_balance(user["_id"])}},
+        )
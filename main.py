@@ -1,11 +1,19 @@
 import os
-from fastapi import FastAPI, HTTPException
+import asyncio
+import logging
+import orjson
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
-from typing import List, Optional, Literal, Any, Dict
+from typing import List, Optional, Literal, Any, Dict, Union
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from datetime import datetime, timezone
+from cachetools import TTLCache
 
-from database import db, create_document, get_documents
+from database import db, create_document, create_documents, upsert_document, get_documents, ping_database, ensure_indexes, ledger_balance, backfill_balances
 from schemas import (
     User,
     WalletTransaction,
@@ -13,10 +21,22 @@ from schemas import (
     SellerAcceptance,
     RoutingAssignment,
     CallRecord,
-    Notification,
+    ObjectIdStr,
 )
 
-app = FastAPI(title="Live Transfers Exchange API")
+logger = logging.getLogger(__name__)
+
+class ObjectIdORJSONResponse(ORJSONResponse):
+    """orjson rendering that also stringifies ObjectIds.
+
+    Return it directly from list endpoints to skip FastAPI's jsonable_encoder pass.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=str)
+
+
+app = FastAPI(title="Live Transfers Exchange API", default_response_class=ObjectIdORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -36,39 +56,228 @@ def oid(id_str: str) -> ObjectId:
         raise HTTPException(status_code=400, detail="Invalid id")
 
 
+_OID_FIELDS = ("buyer_id", "seller_id", "campaign_id", "call_id", "user_id")
+
+
+def user_ref(id_str: str) -> Union[ObjectId, str]:
+    """Notification recipient key: a user's ObjectId, or a placeholder such as "admin" as-is"""
+    return ObjectId(id_str) if ObjectId.is_valid(id_str) else id_str
+
+
+def ref_in(id_value: Union[ObjectId, str]) -> Dict[str, Any]:
+    """Filter for a reference field; older documents store references as hex strings"""
+    _id = oid(id_value)
+    return {"$in": [_id, str(_id)]}
+
+
+def ref_filter(id_str: str) -> Union[Dict[str, Any], str]:
+    """Listing filter for a caller-supplied id.
+
+    Anything that is not an ObjectId matches as a plain string: placeholder
+    recipients such as "admin", and malformed ids (which then match nothing).
+    """
+    return ref_in(id_str) if ObjectId.is_valid(id_str) else id_str
+
+
 def serialize(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a freshly fetched document in place"""
     if not doc:
         return doc
-    d = dict(doc)
-    if d.get("_id"):
-        d["id"] = str(d.pop("_id"))
+    _id = doc.pop("_id", None)
+    if _id is not None:
+        doc["id"] = str(_id)
     # Convert ObjectId inside known fields
-    for k in ["buyer_id", "seller_id", "campaign_id", "call_id", "user_id"]:
-        if k in d and isinstance(d[k], ObjectId):
-            d[k] = str(d[k])
-    return d
+    for k in _OID_FIELDS:
+        v = doc.get(k)
+        if v.__class__ is ObjectId:
+            doc[k] = str(v)
+    return doc
+
+
+def latest_pipeline(q: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+    """Newest-first listing with the API id shape built server-side"""
+    return [
+        {"$match": q},
+        {"$sort": {"created_at": -1}},
+        {"$limit": limit},
+        {"$addFields": {"id": {"$toString": "$_id"}}},
+        {"$project": {"_id": 0}},
+    ]
+
+
+async def stream_json_array(cursor: Any) -> Response:
+    """Stream a cursor as a JSON array, encoding documents as Mongo yields them.
+
+    The first document is read before any bytes are sent, so query errors still
+    surface as a 5xx; the first batch covers the capped listings in full.
+    """
+    try:
+        first = await cursor.next()
+    except StopAsyncIteration:
+        return ObjectIdORJSONResponse([])
+
+    async def chunks():
+        yield b"[" + orjson.dumps(first, default=str)
+        async for doc in cursor:
+            yield b"," + orjson.dumps(doc, default=str)
+        yield b"]"
+
+    return StreamingResponse(chunks(), media_type="application/json")
+
+
+# Role, buyer and price never change after insert, so entries only expire
+_user_roles: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+_campaign_terms: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+
+
+async def user_role(user_id: str) -> Optional[str]:
+    role = _user_roles.get(user_id)
+    if role is None:
+        user = await db["user"].find_one({"_id": oid(user_id)}, {"role": 1})
+        if not user:
+            return None
+        role = _user_roles[user_id] = user.get("role")
+    return role
+
+
+async def campaign_terms(campaign_id: str) -> Optional[Dict[str, Any]]:
+    """Immutable campaign fields (_id, buyer_id, price_per_call); treat as read-only"""
+    terms = _campaign_terms.get(campaign_id)
+    if terms is None:
+        terms = await db["campaign"].find_one({"_id": oid(campaign_id)}, {"buyer_id": 1, "price_per_call": 1})
+        if not terms:
+            return None
+        _campaign_terms[campaign_id] = terms
+    return terms
+
+
+async def get_balance(user_id: str) -> float:
+    user = await db["user"].find_one({"_id": oid(user_id)}, {"balance": 1})
+    if not user:
+        return 0.0
+    if "balance" not in user:
+        # Not yet backfilled; the ledger is authoritative
+        return round(await ledger_balance(user["_id"]), 2)
+    return round(float(user["balance"]), 2)
+
+
+async def adjust_balance(user_id: str, delta: float) -> Optional[Dict[str, Any]]:
+    """Apply a delta already written to the ledger to the cached balance; returns the updated user or None"""
+    _id = oid(user_id)
+    user = await db["user"].find_one_and_update(
+        {"_id": _id, "balance": {"$exists": True}},
+        {"$inc": {"balance": delta}},
+        projection={"balance": 1},
+        return_document=ReturnDocument.AFTER,
+    )
+    if user is None:
+        # Not backfilled yet: report the ledger sum (which includes this entry) without
+        # writing it; seeding is left to backfill_balances so it never races this $inc
+        user = await db["user"].find_one({"_id": _id}, {"balance": 1})
+        if user is not None and "balance" not in user:
+            user["balance"] = await ledger_balance(_id)
+    return user
+
+
+BALANCE_BACKFILL_RETRY = 30  # seconds between attempts while the database is unavailable
 
 
-def get_balance(user_id: str) -> float:
-    txs = db["wallettransaction"].find({"user_id": user_id})
-    balance = 0.0
-    for t in txs:
-        if t.get("type") == "credit":
-            balance += float(t.get("amount", 0))
-        else:
-            balance -= float(t.get("amount", 0))
-    return round(balance, 2)
+async def backfill_balances_until_done() -> None:
+    while True:
+        try:
+            await backfill_balances()
+            return
+        except Exception as e:
+            logger.warning("Balance backfill failed, retrying: %s", e)
+            await asyncio.sleep(BALANCE_BACKFILL_RETRY)
+
+
+# -------- Notification writer ---------
+
+NOTIFY_BATCH_SIZE = 500
+NOTIFY_FLUSH_INTERVAL = 0.02  # seconds to let a batch accumulate
+NOTIFY_QUEUE_MAXSIZE = 10_000  # bounds memory if the database stalls
+
+
+def _notif(user_id: Union[ObjectId, str], message: str) -> Dict[str, Any]:
+    # Server-built notification; skips Notification model validation.
+    # Stamped here so created_at records the event, not the batched write
+    now = datetime.now(timezone.utc)
+    return {"user_id": user_ref(user_id), "message": message, "read": False, "created_at": now, "updated_at": now}
+
+
+def queue_notifications(*docs: Dict[str, Any]) -> None:
+    """Hand notifications to the background writer; no I/O on the request path"""
+    for i, doc in enumerate(docs):
+        try:
+            app.state.notif_queue.put_nowait(doc)
+        except asyncio.QueueFull:
+            logger.warning("Notification queue full; dropped %d notifications", len(docs) - i)
+            return
+
+
+async def write_notifications(batch: List[Dict[str, Any]]) -> None:
+    try:
+        await create_documents("notification", batch)
+    except Exception as e:
+        logger.warning("Dropped %d notifications: %s", len(batch), e)
+
+
+async def notif_flusher(queue: asyncio.Queue) -> None:
+    """Drain the queue in batches until a None sentinel arrives"""
+    while True:
+        doc = await queue.get()
+        if doc is None:
+            return
+        batch = [doc]
+        await asyncio.sleep(NOTIFY_FLUSH_INTERVAL)
+        stopping = False
+        while len(batch) < NOTIFY_BATCH_SIZE and not queue.empty():
+            doc = queue.get_nowait()
+            if doc is None:
+                stopping = True
+                break
+            batch.append(doc)
+        await write_notifications(batch)
+        if stopping:
+            return
 
 
 # -------- Root & Health ---------
 
+@app.on_event("startup")
+async def startup():
+    app.state.notif_queue = asyncio.Queue(maxsize=NOTIFY_QUEUE_MAXSIZE)
+    app.state.notif_task = asyncio.create_task(notif_flusher(app.state.notif_queue))
+    app.state.backfill_task = asyncio.create_task(backfill_balances_until_done())
+    # create_user relies on the unique email index only once it is known to exist
+    app.state.email_index_ready = False
+    try:
+        await ping_database()
+        failures = await ensure_indexes()
+        for collection_name, e in failures.items():
+            logger.warning("Index creation failed for %s: %s", collection_name, e)
+        app.state.email_index_ready = db is not None and "user" not in failures
+    except Exception as e:
+        # Keep serving; /test reports database problems
+        logger.warning("Database warmup failed: %s", e)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.backfill_task.cancel()
+    # Let the writer flush whatever is still queued, then stop
+    await app.state.notif_queue.put(None)
+    await app.state.notif_task
+
+
 @app.get("/")
-def read_root():
+async def read_root():
     return {"message": "Live Transfers Exchange API running"}
 
 
 @app.get("/test")
-def test_database():
+async def test_database():
     response = {
         "backend": "✅ Running",
         "database": "❌ Not Available",
@@ -84,7 +293,7 @@ def test_database():
             response["database_url"] = "✅ Set" if os.getenv("DATABASE_URL") else "❌ Not Set"
             response["database_name"] = db.name
             response["connection_status"] = "Connected"
-            collections = db.list_collection_names()
+            collections = await db.list_collection_names()
             response["collections"] = collections[:10]
             response["database"] = "✅ Connected & Working"
     except Exception as e:
@@ -96,26 +305,25 @@ def test_database():
 # -------- Users ---------
 
 @app.post("/users")
-def create_user(user: User):
-    # Ensure unique email
-    existing = db["user"].find_one({"email": user.email})
-    if existing:
+async def create_user(user: User):
+    # Without the unique email index (see startup), fall back to a pre-check
+    if not app.state.email_index_ready and await db["user"].find_one({"email": user.email}, {"_id": 1}):
+        raise HTTPException(status_code=400, detail="Email already registered")
+    # Balance is only ever moved by ledger writes; the unique email index rejects duplicates
+    try:
+        user_id = await create_document("user", user.model_copy(update={"balance": 0.0}))
+    except DuplicateKeyError:
         raise HTTPException(status_code=400, detail="Email already registered")
-    user_id = create_document("user", user)
     # Starter notification
-    create_document(
-        "notification",
-        Notification(user_id=user_id, message=f"Welcome to Live Transfers Exchange, {user.name}!")
-        .model_dump(),
-    )
+    queue_notifications(_notif(user_id, f"Welcome to Live Transfers Exchange, {user.name}!"))
     return {"id": user_id}
 
 
 @app.get("/users")
-def list_users(role: Optional[str] = None):
+async def list_users(role: Optional[str] = None):
     q = {"role": role} if role else {}
     docs = db["user"].find(q).limit(50)
-    return [serialize(d) for d in docs]
+    return ObjectIdORJSONResponse([serialize(d) async for d in docs])
 
 
 # -------- Wallet ---------
@@ -126,67 +334,67 @@ class TopUp(BaseModel):
 
 
 @app.post("/wallet/topup")
-def wallet_topup(payload: TopUp):
+async def wallet_topup(payload: TopUp):
     if payload.amount < 50:
         raise HTTPException(status_code=400, detail="Minimum top-up is $50")
-    # Ensure user exists and is buyer
-    user = db["user"].find_one({"_id": oid(payload.user_id)})
-    if not user:
+    if await user_role(payload.user_id) is None:
         raise HTTPException(status_code=404, detail="User not found")
+    # Ledger entry first, then the cached balance, so every credit has an audit record
     tx = WalletTransaction(user_id=payload.user_id, type="credit", amount=payload.amount, memo="Account funding")
-    tx_id = create_document("wallettransaction", tx)
-    return {"id": tx_id, "balance": get_balance(payload.user_id)}
+    tx_id = await create_document("wallettransaction", tx)
+    user = await adjust_balance(payload.user_id, payload.amount)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"id": tx_id, "balance": round(user["balance"], 2)}
 
 
 @app.get("/wallet/balance/{user_id}")
-def wallet_balance(user_id: str):
-    return {"user_id": user_id, "balance": get_balance(user_id)}
+async def wallet_balance(user_id: str):
+    return {"user_id": user_id, "balance": await get_balance(user_id)}
 
 
 # -------- Campaigns ---------
 
 @app.post("/campaigns")
-def create_campaign(campaign: Campaign):
+async def create_campaign(campaign: Campaign):
     # Validate buyer exists and role
-    buyer = db["user"].find_one({"_id": oid(campaign.buyer_id)})
-    if not buyer or buyer.get("role") != "buyer":
+    if await user_role(campaign.buyer_id) != "buyer":
         raise HTTPException(status_code=400, detail="Invalid buyer")
     if campaign.price_per_call < 35:
         raise HTTPException(status_code=400, detail="Minimum price per call is $35")
-    camp_id = create_document("campaign", campaign)
+    camp_id = await create_document("campaign", campaign)
     # Notify sellers that a new campaign is available
-    sellers = db["user"].find({"role": "seller"})
-    for s in sellers:
-        create_document(
-            "notification",
-            Notification(user_id=str(s["_id"]), message=f"New campaign available: {campaign.vertical}").model_dump(),
-        )
+    message = f"New campaign available: {campaign.vertical}"
+    sellers = db["user"].find({"role": "seller"}, {"_id": 1})
+    queue_notifications(*[_notif(s["_id"], message) async for s in sellers])
     return {"id": camp_id}
 
 
 @app.get("/campaigns")
-def list_campaigns(role: Optional[str] = None, user_id: Optional[str] = None, status: Optional[str] = None):
+async def list_campaigns(role: Optional[str] = None, user_id: Optional[str] = None, status: Optional[str] = None):
     q: Dict[str, Any] = {}
     if status:
         q["status"] = status
     if role == "buyer" and user_id:
-        q["buyer_id"] = user_id
-    docs = db["campaign"].find(q).sort("created_at", -1).limit(100)
-    return [serialize(d) for d in docs]
+        q["buyer_id"] = ref_filter(user_id)
+    return await stream_json_array(db["campaign"].aggregate(latest_pipeline(q, 100)))
 
 
 @app.get("/campaigns/{campaign_id}")
-def get_campaign(campaign_id: str):
-    doc = db["campaign"].find_one({"_id": oid(campaign_id)})
+async def get_campaign(campaign_id: str):
+    doc = await db["campaign"].find_one({"_id": oid(campaign_id)})
     if not doc:
         raise HTTPException(status_code=404, detail="Campaign not found")
     # Attach acceptances and routing
-    accepts = list(db["selleracceptance"].find({"campaign_id": campaign_id}))
-    routing = db["routingassignment"].find_one({"campaign_id": campaign_id})
+    accepts, routing = await asyncio.gather(
+        db["selleracceptance"].find({"campaign_id": ref_in(doc["_id"])}).to_list(length=None),
+        db["routingassignment"].find_one({"campaign_id": ref_in(doc["_id"])}),
+    )
     out = serialize(doc)
     out["acceptances"] = [serialize(a) for a in accepts]
     out["routing"] = serialize(routing) if routing else None
-    return out
+    # routing.seller_ids holds ObjectIds; orjson's str fallback renders them
+    return ObjectIdORJSONResponse(out)
 
 
 class AcceptPayload(BaseModel):
@@ -195,24 +403,21 @@ class AcceptPayload(BaseModel):
 
 
 @app.post("/campaigns/{campaign_id}/accept")
-def accept_campaign(campaign_id: str, payload: AcceptPayload):
-    camp = db["campaign"].find_one({"_id": oid(campaign_id)})
+async def accept_campaign(campaign_id: str, payload: AcceptPayload):
+    # Independent lookups; validate both after one wait
+    camp, seller_role = await asyncio.gather(campaign_terms(campaign_id), user_role(payload.seller_id))
     if not camp:
         raise HTTPException(status_code=404, detail="Campaign not found")
-    seller = db["user"].find_one({"_id": oid(payload.seller_id)})
-    if not seller or seller.get("role") != "seller":
+    if seller_role != "seller":
         raise HTTPException(status_code=400, detail="Invalid seller")
     # Upsert acceptance
-    existing = db["selleracceptance"].find_one({"campaign_id": campaign_id, "seller_id": payload.seller_id})
-    if existing:
-        db["selleracceptance"].update_one({"_id": existing["_id"]}, {"$set": {"status": payload.status}})
-    else:
-        create_document("selleracceptance", SellerAcceptance(campaign_id=campaign_id, seller_id=payload.seller_id, status=payload.status))
-    # Notify buyer
-    create_document(
-        "notification",
-        Notification(user_id=camp["buyer_id"], message="A seller responded to your campaign.").model_dump(),
+    await upsert_document(
+        "selleracceptance",
+        {"campaign_id": ref_in(campaign_id), "seller_id": ref_in(payload.seller_id)},
+        SellerAcceptance(campaign_id=campaign_id, seller_id=payload.seller_id, status=payload.status),
     )
+    # Notify buyer
+    queue_notifications(_notif(camp["buyer_id"], "A seller responded to your campaign."))
     return {"ok": True}
 
 
@@ -221,36 +426,39 @@ class TransferNumberPayload(BaseModel):
 
 
 @app.post("/campaigns/{campaign_id}/transfer-number")
-def set_transfer_number(campaign_id: str, payload: TransferNumberPayload):
-    camp = db["campaign"].find_one({"_id": oid(campaign_id)})
+async def set_transfer_number(campaign_id: str, payload: TransferNumberPayload):
+    camp = await campaign_terms(campaign_id)
     if not camp:
         raise HTTPException(status_code=404, detail="Campaign not found")
-    db["campaign"].update_one({"_id": camp["_id"]}, {"$set": {"transfer_number": payload.transfer_number, "status": "awaiting_admin"}})
+    await db["campaign"].update_one({"_id": camp["_id"]}, {"$set": {"transfer_number": payload.transfer_number, "status": "awaiting_admin"}})
     # Notify admin placeholder
-    create_document("notification", Notification(user_id="admin", message=f"Campaign {campaign_id} ready for routing").model_dump())
+    queue_notifications(_notif("admin", f"Campaign {campaign_id} ready for routing"))
     return {"ok": True}
 
 
 @app.post("/campaigns/{campaign_id}/assign-routing")
-def assign_routing(campaign_id: str, routing: RoutingAssignment):
-    camp = db["campaign"].find_one({"_id": oid(campaign_id)})
+async def assign_routing(campaign_id: str, routing: RoutingAssignment):
+    camp = await campaign_terms(campaign_id)
     if not camp:
         raise HTTPException(status_code=404, detail="Campaign not found")
-    # Upsert routing
-    existing = db["routingassignment"].find_one({"campaign_id": campaign_id})
-    if existing:
-        db["routingassignment"].update_one({"_id": existing["_id"]}, {"$set": routing.model_dump()})
-    else:
-        create_document("routingassignment", routing)
+    if routing.campaign_id is not None and oid(routing.campaign_id) != oid(campaign_id):
+        raise HTTPException(status_code=400, detail="campaign_id does not match the path")
+    # Upsert routing, keyed by the campaign in the path; rewrites a legacy string reference in place
+    await upsert_document(
+        "routingassignment",
+        {"campaign_id": ref_in(campaign_id)},
+        {**routing.model_dump(exclude={"campaign_id"}), "campaign_id": oid(campaign_id)},
+    )
     # Activate if buyer has >= $50, else set depleted
     buyer_id = camp["buyer_id"]
-    bal = get_balance(buyer_id)
+    bal = await get_balance(buyer_id)
     new_status = "active" if bal >= 50 else "depleted"
-    db["campaign"].update_one({"_id": camp["_id"]}, {"$set": {"status": new_status}})
+    await db["campaign"].update_one({"_id": camp["_id"]}, {"$set": {"status": new_status}})
     # Notify buyer & sellers
-    create_document("notification", Notification(user_id=buyer_id, message="Your campaign routing is configured.").model_dump())
-    for sid in routing.seller_ids:
-        create_document("notification", Notification(user_id=sid, message="You have been assigned to a campaign.").model_dump())
+    queue_notifications(
+        _notif(buyer_id, "Your campaign routing is configured."),
+        *[_notif(sid, "You have been assigned to a campaign.") for sid in routing.seller_ids],
+    )
     return {"ok": True, "status": new_status}
 
 
@@ -258,7 +466,7 @@ def assign_routing(campaign_id: str, routing: RoutingAssignment):
 
 class CallLogPayload(BaseModel):
     campaign_id: str
-    seller_id: Optional[str] = None
+    seller_id: Optional[ObjectIdStr] = None
     did_number: Optional[str] = None
     caller: Optional[str] = None
     called: Optional[str] = None
@@ -268,13 +476,13 @@ class CallLogPayload(BaseModel):
 
 
 @app.post("/calls/log")
-def log_call(payload: CallLogPayload):
-    camp = db["campaign"].find_one({"_id": oid(payload.campaign_id)})
+async def log_call(payload: CallLogPayload):
+    camp = await campaign_terms(payload.campaign_id)
     if not camp:
         raise HTTPException(status_code=404, detail="Campaign not found")
     buyer_id = camp["buyer_id"]
     billable = payload.duration_seconds >= max(60, payload.threshold)
-    disposition = "completed" if payload.duration_seconds > 0 else "failed"
+    disposition = "completed" if billable else ("short" if payload.duration_seconds > 0 else "failed")
     record = CallRecord(
         campaign_id=payload.campaign_id,
         buyer_id=buyer_id,
@@ -286,46 +494,46 @@ def log_call(payload: CallLogPayload):
         billable_threshold=payload.threshold,
         billable=billable,
         recording_url=payload.recording_url,
-        disposition="completed" if billable else ("short" if payload.duration_seconds > 0 else "failed"),
+        disposition=disposition,
     )
-    call_id = create_document("callrecord", record)
+    call_id = await create_document("callrecord", record)
 
     # If billable, charge buyer
     if billable:
         price = float(camp.get("price_per_call", 0))
         tx = WalletTransaction(user_id=buyer_id, type="debit", amount=price, memo="Billable call", campaign_id=payload.campaign_id, call_id=call_id)
-        create_document("wallettransaction", tx)
+        await create_document("wallettransaction", tx)
+        buyer = await adjust_balance(buyer_id, -price)
         # Pause/deplete if balance below 50
-        bal = get_balance(buyer_id)
+        bal = buyer["balance"] if buyer else 0.0
         if bal < 50:
-            db["campaign"].update_one({"_id": camp["_id"]}, {"$set": {"status": "depleted"}})
-            create_document("notification", Notification(user_id=buyer_id, message="Balance low: campaign paused. Please add funds.").model_dump())
+            await db["campaign"].update_one({"_id": camp["_id"]}, {"$set": {"status": "depleted"}})
+            queue_notifications(_notif(buyer_id, "Balance low: campaign paused. Please add funds."))
 
     return {"id": call_id, "billable": billable}
 
 
 @app.get("/calls")
-def list_calls(campaign_id: Optional[str] = None, buyer_id: Optional[str] = None, seller_id: Optional[str] = None):
+async def list_calls(campaign_id: Optional[str] = None, buyer_id: Optional[str] = None, seller_id: Optional[str] = None):
     q: Dict[str, Any] = {}
     if campaign_id:
-        q["campaign_id"] = campaign_id
+        q["campaign_id"] = ref_filter(campaign_id)
     if buyer_id:
-        q["buyer_id"] = buyer_id
+        q["buyer_id"] = ref_filter(buyer_id)
     if seller_id:
-        q["seller_id"] = seller_id
-    docs = db["callrecord"].find(q).sort("created_at", -1).limit(100)
-    return [serialize(d) for d in docs]
+        q["seller_id"] = ref_filter(seller_id)
+    return await stream_json_array(db["callrecord"].aggregate(latest_pipeline(q, 100)))
 
 
 # -------- Notifications ---------
 
 @app.get("/notifications/{user_id}")
-def notifications(user_id: str):
-    docs = db["notification"].find({"user_id": user_id}).sort("created_at", -1).limit(50)
-    return [serialize(d) for d in docs]
+async def notifications(user_id: str):
+    q = {"user_id": ref_filter(user_id)}
+    return ObjectIdORJSONResponse(await db["notification"].aggregate(latest_pipeline(q, 50)).to_list(length=None))
 
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    uvicorn.run(app, host="0.0.0.0", port=port, loop="uvloop", http="httptools")
@@ -3,8 +3,29 @@ Database Schemas for Live Transfers Exchange
 
 Each Pydantic model corresponds to a MongoDB collection (lowercased class name).
 """
-from typing import List, Optional, Literal
-from pydantic import BaseModel, Field
+from typing import Annotated, Any, List, Optional, Literal
+from bson import ObjectId
+from pydantic import BaseModel, BeforeValidator, Field, PlainSerializer, SerializationInfo
+
+
+def _validate_object_id(value: Any) -> str:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, str) and ObjectId.is_valid(value):
+        return value
+    raise ValueError("Invalid id")
+
+
+def _dump_object_id(value: str, info: SerializationInfo) -> Any:
+    return value if info.mode_is_json() else ObjectId(value)
+
+
+# Reference to another document: a hex string in the API, stored as a 12-byte ObjectId
+ObjectIdStr = Annotated[
+    str,
+    BeforeValidator(_validate_object_id),
+    PlainSerializer(_dump_object_id, return_type=Any, when_used="unless-none"),
+]
 
 
 # Users
@@ -15,21 +36,22 @@ class User(BaseModel):
     company: Optional[str] = Field(None, description="Company name")
     phone: Optional[str] = Field(None, description="Contact phone")
     is_active: bool = Field(True)
+    balance: float = Field(0.0, description="Running wallet balance, kept in sync with the ledger")
 
 
 # Wallet transactions (ledger)
 class WalletTransaction(BaseModel):
-    user_id: str = Field(..., description="User identifier (buyer)")
+    user_id: ObjectIdStr = Field(..., description="User identifier (buyer)")
     type: Literal["credit", "debit"] = Field(...)
     amount: float = Field(..., gt=0)
     memo: Optional[str] = None
-    campaign_id: Optional[str] = None
-    call_id: Optional[str] = None
+    campaign_id: Optional[ObjectIdStr] = None
+    call_id: Optional[ObjectIdStr] = None
 
 
 # Campaigns created by buyers
 class Campaign(BaseModel):
-    buyer_id: str
+    buyer_id: ObjectIdStr
     vertical: Literal[
         "Mortgage",
         "Medicare",
@@ -59,23 +81,23 @@ class Campaign(BaseModel):
 
 # Seller accepts a campaign
 class SellerAcceptance(BaseModel):
-    campaign_id: str
-    seller_id: str
+    campaign_id: ObjectIdStr
+    seller_id: ObjectIdStr
     status: Literal["accepted", "rejected"] = "accepted"
 
 
 # Admin assignment of routing/DIDs
 class RoutingAssignment(BaseModel):
-    campaign_id: str
-    seller_ids: List[str] = Field(..., description="Selected sellers for this campaign")
+    campaign_id: Optional[ObjectIdStr] = Field(None, description="Defaults to the campaign in the request path")
+    seller_ids: List[ObjectIdStr] = Field(..., description="Selected sellers for this campaign")
     did_number: str = Field(..., description="Purchased DID from Twilio used as ingress")
 
 
 # Call records
 class CallRecord(BaseModel):
-    campaign_id: str
-    buyer_id: str
-    seller_id: Optional[str] = None
+    campaign_id: ObjectIdStr
+    buyer_id: ObjectIdStr
+    seller_id: Optional[ObjectIdStr] = None
     did_number: Optional[str] = None
     caller: Optional[str] = None
     called: Optional[str] = None
@@ -94,6 +116,6 @@ class CallRecord(BaseModel):
 
 # Simple notifications
 class Notification(BaseModel):
-    user_id: str
+    user_id: str  # ObjectId for users, or a role placeholder such as "admin"
     message: str
     read: bool = False